@@ -9,7 +9,7 @@ from loguru import logger
 from app.core.config import settings
 from app.api.deps import get_current_user
 from app.schemas.users import User
-from app.integrations.speech_processing import generate_speech, transcribe_audio
+from app.integrations.speech_processing import generate_speech, generate_speech_stream, transcribe_audio
 
 router = APIRouter()
 
@@ -70,22 +70,29 @@ async def text_to_speech_stream(
     which can be played directly in supported browsers.
     """
     try:
-        # Request binary data for streaming
-        audio_data = await generate_speech(
+        # Stream audio chunks as the provider synthesizes them
+        audio_stream = generate_speech_stream(
             text=request.text,
             provider=request.provider,
             voice=request.voice,
-            output_format=request.output_format,
-            return_base64=False
+            output_format=request.output_format
         )
         
+        # Wait for the first chunk so provider errors are reported as HTTP errors
+        first_chunk = await audio_stream.__anext__()
+        
+        async def audio_chunks():
+            yield first_chunk
+            async for chunk in audio_stream:
+                yield chunk
+        
         # Create a streaming response
         content_type = f"audio/{request.output_format}"
         if request.output_format == "mp3":
             content_type = "audio/mpeg"
         
         return StreamingResponse(
-            io.BytesIO(audio_data),
+            audio_chunks(),
             media_type=content_type,
             headers={
                 "Content-Disposition": f"attachment; filename=speech.{request.output_format}"
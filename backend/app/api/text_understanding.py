@@ -269,36 +269,7 @@ async def process_audio(request: AudioUnderstandingRequest):
         # Transcribe audio to text
         audio_bytes = base64.b64decode(request.audio_data)
         
-        # Get transcription options
-        language = request.options.get("language", None)
-        prompt = request.options.get("transcription_prompt", None)
-        
-        # Transcribe audio
-        transcription_result = await transcribe_audio(
-            audio_data=audio_bytes,
-            provider=request.options.get("stt_provider", "openai"),
-            language=language,
-            prompt=prompt
-        )
-        
-        # Extract text from transcription
-        transcribed_text = transcription_result.get("text", "")
-        
-        if not transcribed_text:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Could not transcribe audio or empty transcription returned"
-            )
-        
-        # Now process the transcribed text
-        text_request = TextUnderstandingRequest(
-            text=transcribed_text,
-            context_id=request.context_id,
-            options=request.options
-        )
-        
-        # Reuse the text processing endpoint
-        return await process_text(text_request)
+        return await _process_audio_bytes(audio_bytes, request.context_id, request.options)
     
     except Exception as e:
         logger.error(f"Error processing audio: {str(e)}")
@@ -307,6 +278,53 @@ async def process_audio(request: AudioUnderstandingRequest):
             detail=f"Error processing audio: {str(e)}"
         )
 
+async def _process_audio_bytes(
+    audio_bytes: bytes,
+    context_id: Optional[str],
+    options: Dict[str, Any]
+) -> TextUnderstandingResponse:
+    """
+    Transcribe raw audio and process the transcription
+    
+    Args:
+        audio_bytes: The raw audio data
+        context_id: Optional context ID
+        options: Processing and transcription options
+        
+    Returns:
+        The text understanding response
+    """
+    # Get transcription options
+    language = options.get("language", None)
+    prompt = options.get("transcription_prompt", None)
+    
+    # Transcribe audio
+    transcription_result = await transcribe_audio(
+        audio_data=audio_bytes,
+        provider=options.get("stt_provider", "openai"),
+        language=language,
+        prompt=prompt
+    )
+    
+    # Extract text from transcription
+    transcribed_text = transcription_result.get("text", "")
+    
+    if not transcribed_text:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not transcribe audio or empty transcription returned"
+        )
+    
+    # Now process the transcribed text
+    text_request = TextUnderstandingRequest(
+        text=transcribed_text,
+        context_id=context_id,
+        options=options
+    )
+    
+    # Reuse the text processing endpoint
+    return await process_text(text_request)
+
 @router.post("/upload-audio", response_model=TextUnderstandingResponse)
 async def upload_audio(
     file: UploadFile = File(...),
@@ -322,23 +340,18 @@ async def upload_audio(
     try:
         # Read file contents
         audio_bytes = await file.read()
-        audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
         
-        # Create request object
-        request = AudioUnderstandingRequest(
-            audio_data=audio_b64,
-            audio_format=file.filename.split(".")[-1] if "." in file.filename else "mp3",
-            context_id=context_id,
-            options={
+        # Process the raw bytes directly rather than round-tripping through base64
+        return await _process_audio_bytes(
+            audio_bytes,
+            context_id,
+            {
                 "reasoning_type": reasoning_type,
                 "provider": provider,
                 "language": language,
                 "subject": subject
             }
         )
-        
-        # Process using the audio endpoint
-        return await process_audio(request)
     
     except Exception as e:
         logger.error(f"Error processing audio file: {str(e)}")
@@ -15,12 +15,16 @@ from chromadb.config import Settings as ChromaSettings
 from loguru import logger
 import uuid
 import json
+from functools import lru_cache
 
 from app.core.config import settings
 
 # Embedding model
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
+# Retrievers keyed by their full configuration
+_retriever_cache: Dict[str, Any] = {}
+
 def get_chroma_client():
     """Get the ChromaDB client"""
     try:
@@ -39,6 +43,7 @@ def get_chroma_client():
         )
         return client
 
+@lru_cache(maxsize=1)
 def get_embeddings_model():
     """Get the embedding model for document processing"""
     return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
@@ -323,17 +328,30 @@ async def get_retriever(
     Returns:
         A LangChain retriever
     """
-    vectorstore = get_vectorstore(collection_name)
-    kwargs = search_kwargs or {"k": 4}
+    kwargs = dict(search_kwargs or {"k": 4})
     
     # Add filter if provided
     if filter_metadata:
         kwargs["filter"] = filter_metadata
     
-    return vectorstore.as_retriever(
+    cache_key = json.dumps(
+        [collection_name or settings.CHROMADB_COLLECTION_NAME, search_type, kwargs],
+        sort_keys=True,
+        default=str
+    )
+    if not settings.DISABLE_LLM_CACHE and cache_key in _retriever_cache:
+        return _retriever_cache[cache_key]
+    
+    vectorstore = get_vectorstore(collection_name)
+    retriever = vectorstore.as_retriever(
         search_type=search_type,
         search_kwargs=kwargs
     )
+    
+    if not settings.DISABLE_LLM_CACHE:
+        _retriever_cache[cache_key] = retriever
+    
+    return retriever
 
 async def get_textbook_retriever(
     subject: Optional[str] = None,
@@ -361,6 +379,28 @@ async def get_textbook_retriever(
         filter_metadata=filter_dict
     )
 
+async def get_collection_documents(collection_name: Optional[str] = None) -> List[str]:
+    """
+    Get the text of every document in a ChromaDB collection
+    
+    Args:
+        collection_name: Collection name
+        
+    Returns:
+        List of document texts
+    """
+    try:
+        collection = collection_name or settings.CHROMADB_COLLECTION_NAME
+        client = get_chroma_client()
+        
+        chroma_collection = client.get_collection(collection)
+        result = chroma_collection.get(include=["documents"])
+        
+        return [doc for doc in result.get("documents", []) if doc]
+    except Exception as e:
+        logger.error(f"Error getting collection documents: {e}")
+        return []
+
 async def get_collection_info(collection_name: Optional[str] = None) -> Dict[str, Any]:
     """
     Get information about a ChromaDB collection
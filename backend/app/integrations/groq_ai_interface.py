@@ -1,10 +1,15 @@
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Union, AsyncIterator
+from functools import lru_cache
+import asyncio
+import orjson
 from langchain_groq import ChatGroq
 from langchain.schema import HumanMessage, SystemMessage
 from groq import Groq
 from loguru import logger
 
 from app.core.config import settings
+from app.integrations.prompt_utils import canonicalize_prompt
+from app.integrations.single_flight import make_request_key, single_flight
 
 # Default models
 DEFAULT_CHAT_MODEL = "llama3-70b-8192"
@@ -16,7 +21,14 @@ def get_groq_client():
         logger.error("GROQ_API_KEY is not set")
         raise ValueError("GROQ_API_KEY is not set. Please set it in your environment variables.")
     
-    return Groq(api_key=settings.GROQ_API_KEY)
+    if settings.DISABLE_LLM_CACHE:
+        return Groq(api_key=settings.GROQ_API_KEY)
+    return _cached_groq_client(settings.GROQ_API_KEY)
+
+@lru_cache(maxsize=4)
+def _cached_groq_client(api_key: str):
+    """Shared Groq client so its connection pool is reused across requests"""
+    return Groq(api_key=api_key)
 
 def get_groq_llm(
     model_name: Optional[str] = None,
@@ -26,6 +38,9 @@ def get_groq_llm(
     """
     Get a Groq LLM for LangChain
     
+    Instances are cached per (model, temperature, max_tokens) unless
+    DISABLE_LLM_CACHE is set.
+    
     Args:
         model_name: Groq model to use
         temperature: Generation temperature
@@ -40,7 +55,12 @@ def get_groq_llm(
     
     model = model_name or DEFAULT_CHAT_MODEL
     
-    # Create the LangChain LLM
+    if settings.DISABLE_LLM_CACHE:
+        return _create_groq_llm(model, temperature, max_tokens)
+    return _cached_groq_llm(model, temperature, max_tokens)
+
+def _create_groq_llm(model: str, temperature: float, max_tokens: int):
+    """Construct a new LangChain Groq LLM"""
     groq_llm = ChatGroq(
         groq_api_key=settings.GROQ_API_KEY,
         model_name=model,
@@ -50,6 +70,8 @@ def get_groq_llm(
     
     return groq_llm
 
+_cached_groq_llm = lru_cache(maxsize=32)(_create_groq_llm)
+
 async def generate_chat_completion(
     messages: List[Dict[str, str]],
     model_name: Optional[str] = None,
@@ -70,11 +92,33 @@ async def generate_chat_completion(
     Returns:
         Dictionary with the response
     """
-    client = get_groq_client()
     model = model_name or DEFAULT_CHAT_MODEL
     
+    if stream:
+        return await _chat_completion(messages, model, temperature, max_tokens, stream)
+    
+    # Identical concurrent requests share a single upstream call
+    key = make_request_key("groq", model, messages, temperature, max_tokens)
+    return await single_flight(
+        key,
+        lambda: _chat_completion(messages, model, temperature, max_tokens, stream)
+    )
+
+async def _chat_completion(
+    messages: List[Dict[str, str]],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    stream: bool
+) -> Dict[str, Any]:
+    """Call the Groq chat completions API"""
+    client = get_groq_client()
+    
     try:
-        completion = client.chat.completions.create(
+        # The Groq client is blocking; run it in a worker thread so the event
+        # loop (and concurrent callers sharing this request) are not stalled
+        completion = await asyncio.to_thread(
+            client.chat.completions.create,
             model=model,
             messages=messages,
             temperature=temperature,
@@ -83,8 +127,8 @@ async def generate_chat_completion(
         )
         
         if stream:
-            # Return a generator for streaming
-            return {"type": "stream", "generator": completion}
+            # Return the raw generator plus an async iterator over the deltas
+            return {"type": "stream", "generator": completion, "stream": iter_stream(completion)}
         else:
             # Process the regular response
             return {
@@ -100,6 +144,55 @@ async def generate_chat_completion(
         logger.error(f"Error generating Groq completion: {e}")
         return {"type": "error", "error": str(e)}
 
+async def iter_stream(
+    completion,
+    buffer: Optional[List[str]] = None
+) -> AsyncIterator[str]:
+    """
+    Iterate over the text deltas of a streaming completion
+    
+    The Groq client's stream is blocking, so each chunk is fetched in a worker
+    thread to keep the event loop free.
+    
+    Args:
+        completion: Streaming completion returned by the Groq client
+        buffer: Optional list that every delta is appended to
+        
+    Yields:
+        Text deltas as they arrive
+    """
+    iterator = iter(completion)
+    while True:
+        chunk = await asyncio.to_thread(next, iterator, None)
+        if chunk is None:
+            break
+        
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            if buffer is not None:
+                buffer.append(delta)
+            yield delta
+
+async def collect_stream(stream: AsyncIterator[str]) -> str:
+    """
+    Drain a delta stream into a single string
+    
+    Deltas are buffered in a list and joined once at the end instead of being
+    concatenated chunk by chunk.
+    """
+    buffer: List[str] = []
+    async for delta in stream:
+        buffer.append(delta)
+    return "".join(buffer)
+
+@lru_cache(maxsize=256)
+def _schema_message(schema_json: str) -> Dict[str, str]:
+    """Build the schema instruction message once per distinct schema"""
+    return {
+        "role": "system",
+        "content": f"Respond only with a JSON object matching this JSON schema:\n{schema_json}"
+    }
+
 async def generate_structured_output(
     prompt: str,
     output_schema: Dict[str, Any],
@@ -108,7 +201,10 @@ async def generate_structured_output(
     temperature: float = 0.2
 ) -> Dict[str, Any]:
     """
-    Generate structured JSON output using function calling
+    Generate structured JSON output using JSON mode
+    
+    The schema is given to the model as an instruction and the response is
+    constrained to a JSON object, avoiding the function-calling envelope.
     
     Args:
         prompt: User prompt
@@ -123,38 +219,31 @@ async def generate_structured_output(
     client = get_groq_client()
     model = model_name or DEFAULT_CHAT_MODEL
     
-    # Prepare messages
+    # Prepare messages, keeping the static system prompt and schema instruction
+    # first and normalized so repeated calls share a cacheable prefix
+    schema_json = orjson.dumps(output_schema, option=orjson.OPT_SORT_KEYS).decode("utf-8")
     messages = []
     if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "system", "content": canonicalize_prompt(system_prompt)})
+    messages.append(_schema_message(schema_json))
     messages.append({"role": "user", "content": prompt})
     
-    # Define the function for structured output
-    functions = [
-        {
-            "name": "generate_structured_output",
-            "description": "Generate structured data based on the input",
-            "parameters": output_schema
-        }
-    ]
-    
     try:
-        response = client.chat.completions.create(
+        response = await asyncio.to_thread(
+            client.chat.completions.create,
             model=model,
             messages=messages,
-            functions=functions,
-            function_call={"name": "generate_structured_output"},
+            response_format={"type": "json_object"},
             temperature=temperature
         )
         
-        # Extract the function call response
-        function_call = response.choices[0].message.function_call
-        if function_call and function_call.arguments:
+        # Parse the JSON response
+        content = response.choices[0].message.content
+        if content:
             try:
-                import json
-                return json.loads(function_call.arguments)
-            except json.JSONDecodeError:
-                logger.error(f"Error parsing JSON response: {function_call.arguments}")
+                return orjson.loads(content)
+            except orjson.JSONDecodeError:
+                logger.error(f"Error parsing JSON response: {content}")
                 return {"error": "Failed to parse JSON response"}
         else:
             return {"error": "No structured output generated"}
@@ -167,7 +256,8 @@ async def generate_text(
     system_prompt: Optional[str] = None,
     model_name: Optional[str] = None,
     temperature: float = 0.7,
-    max_tokens: int = 4096
+    max_tokens: int = 4096,
+    stream: bool = False
 ) -> str:
     """
     Generate text using the Groq API
@@ -178,6 +268,7 @@ async def generate_text(
         model_name: Model to use (default from config)
         temperature: Temperature for generation
         max_tokens: Maximum tokens to generate
+        stream: Whether to stream the completion and collect it
         
     Returns:
         Generated text
@@ -193,10 +284,55 @@ async def generate_text(
         messages=messages,
         model_name=model_name,
         temperature=temperature,
-        max_tokens=max_tokens
+        max_tokens=max_tokens,
+        stream=stream
     )
     
     if result["type"] == "complete":
         return result["content"]
+    elif result["type"] == "stream":
+        return await collect_stream(result["stream"])
     else:
         return f"Error: {result.get('error', 'Unknown error')}"
+
+
+async def stream_text(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    model_name: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 4096
+) -> AsyncIterator[str]:
+    """
+    Stream generated text from the Groq API
+    
+    Suitable for passing to a FastAPI StreamingResponse.
+    
+    Args:
+        prompt: The prompt to generate text from
+        system_prompt: Optional system prompt
+        model_name: Model to use (default from config)
+        temperature: Temperature for generation
+        max_tokens: Maximum tokens to generate
+        
+    Yields:
+        Text deltas as they arrive
+    """
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    
+    result = await generate_chat_completion(
+        messages=messages,
+        model_name=model_name,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True
+    )
+    
+    if result["type"] != "stream":
+        raise RuntimeError(result.get("error", "Unknown error"))
+    
+    async for delta in result["stream"]:
+        yield delta
\ No newline at end of file
@@ -1,14 +1,71 @@
-from typing import Dict, List, Any, Optional, Union, Callable
+from typing import Dict, List, Any, Optional, Union, Callable, Tuple
 from langchain.schema import Document
-from langchain.prompts import PromptTemplate
+from langchain.prompts import PromptTemplate, ChatPromptTemplate
 from langchain.chains import LLMChain, ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough
+from langchain.memory import ConversationTokenBufferMemory
+from langchain.chains.conversational_retrieval.prompts import CONDENSE_QUESTION_PROMPT
+from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda
+from langchain_core.globals import set_llm_cache
+from langchain_community.cache import SQLiteCache
+from loguru import logger
 
 from app.core.config import settings
-from app.db.chromadb import get_retriever
+from app.db.chromadb import get_retriever, get_collection_documents
 from app.integrations.ollama_interface import get_ollama_llm
 from app.integrations.groq_ai_interface import get_groq_llm
+from app.integrations.prompt_utils import canonicalize_prompt, count_tokens
+
+# Template that encourages step-by-step thinking
+COT_TEMPLATE = """
+{system_prompt}
+
+I want you to solve this step-by-step, explaining your reasoning.
+
+User: {question}
+
+Assistant: Let me think through this step-by-step:
+"""
+
+# Default system prompt for RAG
+DEFAULT_RAG_SYSTEM_PROMPT = """
+You are an AI assistant that helps with answering questions.
+Use the following retrieved context to answer the user's question.
+If you don't know the answer based on the context, just say so.
+Don't make up information that's not in the context.
+"""
+
+# Prompts are built once at import instead of on every request
+_COT_PROMPT = PromptTemplate(
+    input_variables=["system_prompt", "question"],
+    template=COT_TEMPLATE
+)
+
+# Keep the system prompt as a separate, byte-stable first message so
+# providers with prefix caching can reuse it across requests
+_RAG_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "{system_prompt}"),
+    ("human", "Context:\n{context}\n\nUser question: {question}")
+])
+
+# Cache-augmented generation: the documents live in the system prompt
+_CAG_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "{system_prompt}"),
+    ("human", "User question: {question}")
+])
+
+# Preloaded CAG document blocks per collection, with their token counts
+_cag_context_cache: Dict[str, Tuple[str, int]] = {}
+
+def configure_llm_cache():
+    """
+    Enable the persistent SQLite LLM cache if configured
+    
+    Once set, every LangChain LLM call with an identical prompt and
+    parameters is served from disk, which also survives restarts.
+    """
+    if settings.LLM_DISK_CACHE:
+        set_llm_cache(SQLiteCache(database_path=settings.LLM_CACHE_PATH))
+        logger.info(f"LLM disk cache enabled at {settings.LLM_CACHE_PATH}")
 
 def get_llm(provider: str = "ollama"):
     """Get the appropriate LLM based on the provider"""
@@ -20,6 +77,47 @@ def get_llm(provider: str = "ollama"):
         # Default to Ollama
         return get_ollama_llm()
 
+def format_docs(docs: List[Document]) -> str:
+    """Format the context from retrieved documents"""
+    return "\n\n".join(d.page_content for d in docs)
+
+def get_memory_token_limit(system_prompt: str) -> int:
+    """
+    Token budget for conversation history
+    
+    Half of the context window is reserved for the answer, the prompt
+    overhead is subtracted and a 20% safety margin is kept.
+    """
+    return max(int((settings.MAX_SEQ_LEN / 2 - count_tokens(system_prompt)) * 0.8), 0)
+
+async def get_cag_context(collection_name: Optional[str], system_prompt: str) -> Optional[str]:
+    """
+    Load a whole collection as a document block for cache-augmented generation
+    
+    The block is built once per collection and checked against the token
+    budget of each system prompt. Returns None when the collection is empty
+    or doesn't fit the budget, in which case retrieval is used.
+    """
+    collection = collection_name or settings.CHROMADB_COLLECTION_NAME
+    
+    cached = _cag_context_cache.get(collection)
+    if cached is None:
+        documents = await get_collection_documents(collection)
+        if not documents:
+            # Not cached: the collection may be filled later, or the load may have failed
+            return None
+        
+        joined = "\n\n".join(doc.strip() for doc in documents)
+        context = f"<documents>\n{joined}\n</documents>"
+        cached = _cag_context_cache[collection] = (context, count_tokens(context))
+    
+    context, tokens = cached
+    if tokens > get_memory_token_limit(system_prompt):
+        logger.debug(f"Collection {collection} is too large for CAG, using retrieval")
+        return None
+    
+    return context
+
 async def create_chain_of_thought_chain(
     system_prompt: str,
     provider: str = "ollama"
@@ -27,25 +125,9 @@ async def create_chain_of_thought_chain(
     """Create a chain for Chain-of-Thought reasoning"""
     llm = get_llm(provider)
     
-    # Template that encourages step-by-step thinking
-    cot_template = """
-    {system_prompt}
-    
-    I want you to solve this step-by-step, explaining your reasoning.
-    
-    User: {question}
-    
-    Assistant: Let me think through this step-by-step:
-    """
-    
-    cot_prompt = PromptTemplate(
-        input_variables=["system_prompt", "question"],
-        template=cot_template
-    )
-    
     chain = LLMChain(
         llm=llm,
-        prompt=cot_prompt,
+        prompt=_COT_PROMPT,
         verbose=settings.LANGCHAIN_TRACING
     )
     
@@ -54,47 +136,43 @@ async def create_chain_of_thought_chain(
 async def create_rag_chain(
     collection_name: Optional[str] = None,
     system_prompt: Optional[str] = None,
-    provider: str = "ollama"
+    provider: str = "ollama",
+    use_cag: bool = False
 ):
-    """Create a RAG chain for retrieval-augmented generation"""
-    llm = get_llm(provider)
-    retriever = await get_retriever(collection_name)
-    
-    # Default system prompt for RAG
-    default_system_prompt = """
-    You are an AI assistant that helps with answering questions.
-    Use the following retrieved context to answer the user's question.
-    If you don't know the answer based on the context, just say so.
-    Don't make up information that's not in the context.
     """
+    Create a RAG chain for retrieval-augmented generation
     
-    # Set up the RAG prompt
-    rag_prompt_template = """
-    {system_prompt}
-    
-    Context:
-    {context}
-    
-    User question: {question}
-    
-    Answer:
+    With use_cag, a collection that fits in the context window is placed
+    in the system prompt once (cache-augmented generation), skipping
+    retrieval and letting the provider cache the document prefix.
     """
+    llm = get_llm(provider)
+    resolved_system_prompt = canonicalize_prompt(system_prompt or DEFAULT_RAG_SYSTEM_PROMPT)
+    
+    if use_cag:
+        cag_context = await get_cag_context(collection_name, resolved_system_prompt)
+        if cag_context:
+            cag_system_prompt = f"{resolved_system_prompt}\n\n{cag_context}"
+            return (
+                RunnableParallel(
+                    question=RunnablePassthrough(),
+                    system_prompt=RunnableLambda(lambda _: cag_system_prompt)
+                )
+                | _CAG_PROMPT
+                | llm
+            )
     
-    rag_prompt = PromptTemplate(
-        input_variables=["system_prompt", "context", "question"],
-        template=rag_prompt_template
-    )
-    
-    # Format the context from retrieved documents
-    def format_docs(docs):
-        return "\n\n".join([d.page_content for d in docs])
+    retriever = await get_retriever(collection_name)
     
     # Build the RAG chain
+    # Retrieval and the other prompt inputs are resolved concurrently
     rag_chain = (
-        {"context": retriever | format_docs, 
-         "question": RunnablePassthrough(), 
-         "system_prompt": lambda _: system_prompt or default_system_prompt}
-        | rag_prompt
+        RunnableParallel(
+            context=retriever | RunnableLambda(format_docs),
+            question=RunnablePassthrough(),
+            system_prompt=RunnableLambda(lambda _: resolved_system_prompt)
+        )
+        | _RAG_PROMPT
         | llm
     )
     
@@ -108,8 +186,10 @@ async def create_conversational_rag_chain(
     llm = get_llm(provider)
     retriever = await get_retriever(collection_name)
     
-    # Set up memory
-    memory = ConversationBufferMemory(
+    # Set up memory bounded by a token budget; the oldest turns are dropped first
+    memory = ConversationTokenBufferMemory(
+        llm=llm,
+        max_token_limit=get_memory_token_limit(CONDENSE_QUESTION_PROMPT.template),
         memory_key="chat_history",
         return_messages=True
     )
@@ -138,16 +218,19 @@ async def process_with_rag(
     question: str,
     collection_name: Optional[str] = None,
     system_prompt: Optional[str] = None,
-    provider: str = "ollama"
+    provider: str = "ollama",
+    use_cag: bool = False
 ):
     """Process a question using RAG"""
     chain = await create_rag_chain(
         collection_name=collection_name,
         system_prompt=system_prompt,
-        provider=provider
+        provider=provider,
+        use_cag=use_cag
     )
     
-    result = await chain.invoke(question)
+    # Async invocation so retrieval doesn't block the event loop
+    result = await chain.ainvoke(question)
     return result
 
 async def process_conversational_rag(
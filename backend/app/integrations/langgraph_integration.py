@@ -1,21 +1,19 @@
 from typing import Dict, List, Any, Optional, TypedDict, Annotated, Literal
 from enum import Enum
-import operator
 from langgraph.graph import StateGraph
-from langgraph.prebuilt import ToolExecutor
 from langgraph.prebuilt.tool_node import ToolNode
 from langchain.tools import Tool
 from langchain.schema import Document
 from langchain.schema.runnable import RunnablePassthrough, RunnableLambda
 from langchain.schema.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain_core.messages import ChatMessage, FunctionMessage
-import json
 from loguru import logger
 
 from app.core.config import settings
 from app.db.chromadb import get_retriever
 from app.integrations.ollama_interface import get_ollama_llm
 from app.integrations.groq_ai_interface import get_groq_llm
+from app.integrations.prompt_utils import canonicalize_prompt
 
 # State definition for the graph
 class GraphState(TypedDict):
@@ -54,16 +52,15 @@ async def create_retrieve_analyze_graph(
     If you need more information, you can ask for it. If you have enough information, provide a complete answer.
     """
     
+    # Build the system message once so every turn shares a byte-identical prefix
+    system_message = SystemMessage(content=canonicalize_prompt(system_prompt or default_system_prompt))
+    
     # Get LLM
     llm = get_llm(provider)
     
     # Get retriever
     retriever = await get_retriever(collection_name)
     
-    # Tools setup
-    tools = []
-    tool_executor = ToolExecutor(tools)
-    
     # Define states
     class AgentState(TypedDict):
         """State for the agent"""
@@ -71,61 +68,71 @@ async def create_retrieve_analyze_graph(
         documents: List[Document]
         intermediate_steps: List[Dict[str, Any]]
         next: Optional[str]
+        context_key: Optional[int]
+        last_human_idx: Optional[int]
     
     # Define node functions
-    async def retrieve_documents(state: AgentState) -> AgentState:
+    async def retrieve_documents(state: AgentState) -> Dict[str, Any]:
         """Retrieve relevant documents"""
-        # Get the last user message
+        # Get the last user message from its tracked index, falling back to
+        # a backward scan if the index wasn't provided
+        messages = state["messages"]
         last_message = None
-        for message in reversed(state["messages"]):
-            if isinstance(message, HumanMessage):
-                last_message = message
-                break
+        last_human_idx = state.get("last_human_idx")
+        if last_human_idx is not None and 0 <= last_human_idx < len(messages):
+            last_message = messages[last_human_idx]
+        else:
+            for message in reversed(messages):
+                if isinstance(message, HumanMessage):
+                    last_message = message
+                    break
         
         if not last_message:
-            return state
+            return {"documents": []}
         
-        # Use the retriever to get documents
+        # Use the async retriever so the ChromaDB round-trip doesn't block the event loop
         query = last_message.content
-        documents = retriever.get_relevant_documents(query)
+        documents = await retriever.ainvoke(query)
         
-        # Update state
-        new_state = state.copy()
-        new_state["documents"] = documents
+        # Return only the changed keys; LangGraph merges them into the state
+        update = {"documents": documents}
         
-        # Add system message with context
-        context = "\n\n".join([doc.page_content for doc in documents])
-        new_state["messages"].append(
-            SystemMessage(content=f"Here are some relevant documents:\n\n{context}")
-        )
+        # Follow-up rounds often retrieve the same documents; only build and
+        # add the context message when the retrieved set has changed
+        context_key = hash(tuple(doc.page_content for doc in documents))
+        if context_key != state.get("context_key"):
+            context = "\n\n".join(doc.page_content for doc in documents)
+            update["messages"] = messages + [
+                SystemMessage(content=f"Here are some relevant documents:\n\n{context}")
+            ]
+            update["context_key"] = context_key
         
-        return new_state
+        return update
     
-    async def analyze_documents(state: AgentState) -> AgentState:
+    async def analyze_documents(state: AgentState) -> Dict[str, Any]:
         """Analyze documents and generate response"""
         # Create messages for LLM with system prompt
-        messages = [SystemMessage(content=system_prompt or default_system_prompt)]
+        messages = [system_message]
         messages.extend(state["messages"])
         
         # Get response from LLM
         response = await llm.ainvoke(messages)
         
-        # Update state
-        new_state = state.copy()
-        new_state["messages"].append(AIMessage(content=response.content))
-        
         # Decide next step
         if "need more information" in response.content.lower():
-            new_state["next"] = "ask_followup"
+            next_step = "ask_followup"
         else:
-            new_state["next"] = "end"
+            next_step = "end"
         
-        return new_state
+        return {
+            "messages": state["messages"] + [AIMessage(content=response.content)],
+            "next": next_step
+        }
     
-    async def ask_followup(state: AgentState) -> AgentState:
+    async def ask_followup(state: AgentState) -> Dict[str, Any]:
         """Ask follow-up question if needed"""
         # Update state to continue
-        return {**state, "next": "retrieve_documents"}
+        return {"next": "retrieve_documents"}
     
     # Create the graph
     workflow = StateGraph(AgentState)
@@ -174,8 +181,8 @@ async def create_agent_workflow(
     # Get LLM
     llm = get_llm(provider)
     
-    # Set up tool execution
-    tool_executor = ToolExecutor(tools)
+    # Set up tool execution; tools are dispatched by name in O(1)
+    tools_by_name = {tool.name: tool for tool in tools}
     tool_node = ToolNode(tools)
     
     # Define state
@@ -210,7 +217,7 @@ async def create_agent_workflow(
             # Return answer
             return {"next": "end", "messages": messages + [response]}
     
-    def action(state: AgentState) -> Dict:
+    async def action(state: AgentState) -> Dict:
         """Execute tools"""
         # Get the last message
         last_message = state["messages"][-1]
@@ -219,8 +226,12 @@ async def create_agent_workflow(
         action_input = last_message.tool_calls[0].get("args", {})
         action_name = last_message.tool_calls[0].get("name", "")
         
-        # Execute the tool
-        observation = tool_executor.invoke({"name": action_name, "input": action_input})
+        # Execute the tool; sync tools are run in an executor by ainvoke
+        tool = tools_by_name.get(action_name)
+        if tool is None:
+            observation = f"Unknown tool: {action_name}"
+        else:
+            observation = await tool.ainvoke(action_input)
         
         # Add to intermediate steps
         intermediate_steps = state.get("intermediate_steps", [])
@@ -294,7 +305,8 @@ async def process_with_graph(
     initial_state = {
         "messages": messages,
         "documents": [],
-        "intermediate_steps": []
+        "intermediate_steps": [],
+        "last_human_idx": len(messages) - 1
     }
     
     # Run the workflow
@@ -1,13 +1,24 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
+from collections import OrderedDict
+from functools import lru_cache
+import asyncio
 from langchain_community.llms import Ollama
 from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.schema.output_parser import StrOutputParser
 from pydantic import BaseModel
 import httpx
+import orjson
 from loguru import logger
 
 from app.core.config import settings
+from app.integrations.single_flight import make_request_key, single_flight
+
+# Embedding micro-batching settings
+EMBED_BATCH_MAX = 64
+EMBED_BATCH_WAIT_MS = 8
+EMBED_MAX_CONCURRENCY = 32
+EMBED_CACHE_SIZE = 1024
 
 class OllamaRequest(BaseModel):
     """Ollama API request model"""
@@ -42,6 +53,9 @@ def get_ollama_llm(
     """
     Get an Ollama LLM for use with LangChain
     
+    Instances are cached per (model, temperature, streaming) unless
+    DISABLE_LLM_CACHE is set.
+    
     Args:
         model_name: Model to use (default from config)
         temperature: Temperature for generation
@@ -52,6 +66,12 @@ def get_ollama_llm(
     """
     model = model_name or settings.OLLAMA_MODEL
     
+    if settings.DISABLE_LLM_CACHE:
+        return _create_ollama_llm(model, temperature, streaming)
+    return _cached_ollama_llm(model, temperature, streaming)
+
+def _create_ollama_llm(model: str, temperature: float, streaming: bool):
+    """Construct a new Ollama LLM"""
     # Set up callbacks for streaming if needed
     callback_manager = None
     if streaming:
@@ -66,6 +86,40 @@ def get_ollama_llm(
     
     return ollama_llm
 
+_cached_ollama_llm = lru_cache(maxsize=32)(_create_ollama_llm)
+
+def _build_generate_request(
+    prompt: str,
+    system_prompt: Optional[str],
+    model_name: Optional[str],
+    temperature: float,
+    max_tokens: int,
+    stop_sequences: Optional[List[str]]
+) -> Dict[str, Any]:
+    """Build the request body for the Ollama generate API"""
+    model = model_name or settings.OLLAMA_MODEL
+    
+    # Prepare the request
+    request_data = {
+        "model": model,
+        "prompt": prompt,
+        "stream": True,
+        "options": {
+            "temperature": temperature,
+            "num_predict": max_tokens
+        }
+    }
+    
+    # Add system prompt if provided
+    if system_prompt:
+        request_data["system"] = system_prompt
+        
+    # Add stop sequences if provided
+    if stop_sequences:
+        request_data["options"]["stop"] = stop_sequences
+    
+    return request_data
+
 async def generate_text(
     prompt: str,
     system_prompt: Optional[str] = None,
@@ -88,47 +142,238 @@ async def generate_text(
     Returns:
         Generated text
     """
-    model = model_name or settings.OLLAMA_MODEL
+    request_data = _build_generate_request(
+        prompt, system_prompt, model_name, temperature, max_tokens, stop_sequences
+    )
+    
+    # Identical concurrent requests share a single upstream call
+    key = make_request_key("ollama", request_data)
+    return await single_flight(key, lambda: _collect_generate(request_data))
+
+async def generate_text_stream(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    model_name: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 4096,
+    stop_sequences: Optional[List[str]] = None
+) -> AsyncIterator[str]:
+    """
+    Stream generated text from the Ollama API
+    
+    Args:
+        prompt: The prompt to generate text from
+        system_prompt: Optional system prompt
+        model_name: Model to use (default from config)
+        temperature: Temperature for generation
+        max_tokens: Maximum tokens to generate
+        stop_sequences: Optional stop sequences
+        
+    Yields:
+        Text chunks as the model produces them
+    """
+    request_data = _build_generate_request(
+        prompt, system_prompt, model_name, temperature, max_tokens, stop_sequences
+    )
+    
+    async for chunk in _stream_generate(request_data):
+        yield chunk
+
+async def _stream_generate(request_data: Dict[str, Any]) -> AsyncIterator[str]:
+    """Call the Ollama generate API and yield response chunks"""
     base_url = settings.OLLAMA_BASE_URL
     
+    async with httpx.AsyncClient() as client:
+        async with client.stream(
+            "POST",
+            f"{base_url}/api/generate",
+            json=request_data,
+            timeout=60.0
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                logger.error(f"Ollama API error: {response.status_code} - {response.text}")
+                response.raise_for_status()
+            
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                
+                chunk = orjson.loads(line)
+                text = chunk.get("response")
+                if text:
+                    yield text
+                if chunk.get("done"):
+                    break
+
+async def _collect_generate(request_data: Dict[str, Any]) -> str:
+    """Stream a generation and join the chunks once at the end"""
     try:
-        # Prepare the request
-        request_data = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens
-            }
-        }
+        buffer: List[str] = []
+        async for chunk in _stream_generate(request_data):
+            buffer.append(chunk)
+        return "".join(buffer)
+    except httpx.HTTPStatusError as e:
+        return f"Error generating text: {e.response.status_code}"
+    except Exception as e:
+        logger.error(f"Error in Ollama text generation: {e}")
+        return f"Error: {str(e)}"
+
+class _EmbedBatcher:
+    """
+    Coalesces concurrent embedding calls into batches
+    
+    Requests submitted within a short window are collected (up to EMBED_BATCH_MAX)
+    and dispatched concurrently over a shared HTTP client, bounded by a semaphore.
+    Identical (model, text) pairs share a single in-flight request, and recent
+    results are kept in a small LRU cache.
+    """
+    
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.client: Optional[httpx.AsyncClient] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.cache: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self.dispatch_tasks = set()
+    
+    def _ensure_started(self):
+        """Start the background worker on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self.loop is loop and self.worker and not self.worker.done():
+            return
+        
+        if self.client is not None:
+            self._discard(self.loop, self.worker, self.client)
+        
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.semaphore = asyncio.Semaphore(EMBED_MAX_CONCURRENCY)
+        self.client = httpx.AsyncClient(base_url=settings.OLLAMA_BASE_URL, timeout=30.0)
+        self.inflight = {}
+        self.worker = loop.create_task(self._run())
+    
+    def _discard(self, loop: asyncio.AbstractEventLoop, worker: Optional[asyncio.Task], client: httpx.AsyncClient):
+        """Stop a worker and close its client on the loop they were created on"""
+        async def close():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing Ollama embedding client: {e}")
         
-        # Add system prompt if provided
-        if system_prompt:
-            request_data["system"] = system_prompt
+        def start_close(on_loop: asyncio.AbstractEventLoop):
+            task = on_loop.create_task(close())
+            self.dispatch_tasks.add(task)
+            task.add_done_callback(self.dispatch_tasks.discard)
+        
+        def stop():
+            if worker is not None:
+                worker.cancel()
+            start_close(loop)
+        
+        running = asyncio.get_running_loop()
+        if loop is running:
+            stop()
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(stop)
+        else:
+            # The old loop is gone, so release the client's pool from this one
+            start_close(running)
+    
+    async def aclose(self):
+        """Stop the worker, fail pending requests and close the HTTP client"""
+        if self.worker is not None:
+            self.worker.cancel()
+        for task in list(self.dispatch_tasks):
+            task.cancel()
+        for future in self.inflight.values():
+            if not future.done():
+                future.cancel()
+        if self.client is not None:
+            await self.client.aclose()
+        
+        self.queue = self.semaphore = self.client = self.worker = self.loop = None
+        self.inflight = {}
+        self.dispatch_tasks = set()
+    
+    async def submit(self, text: str, model: str) -> List[float]:
+        """Queue a text for embedding and wait for the result"""
+        key = (model, text)
+        
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            return cached
+        
+        self._ensure_started()
+        
+        future = self.inflight.get(key)
+        if future is None:
+            future = self.loop.create_future()
+            self.inflight[key] = future
+            await self.queue.put((key, future))
+        
+        return await asyncio.shield(future)
+    
+    async def _run(self):
+        """Collect queued requests into batches and dispatch them"""
+        while True:
+            items = [await self.queue.get()]
+            deadline = self.loop.time() + EMBED_BATCH_WAIT_MS / 1000
             
-        # Add stop sequences if provided
-        if stop_sequences:
-            request_data["options"]["stop"] = stop_sequences
+            while len(items) < EMBED_BATCH_MAX:
+                remaining = deadline - self.loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
             
-        # Make the API call
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{base_url}/api/generate",
-                json=request_data,
-                timeout=60.0
-            )
+            task = self.loop.create_task(self._dispatch(items))
+            self.dispatch_tasks.add(task)
+            task.add_done_callback(self.dispatch_tasks.discard)
+    
+    async def _dispatch(self, items: List[Tuple[Tuple[str, str], asyncio.Future]]):
+        """Send a batch of embedding requests concurrently"""
+        await asyncio.gather(*[self._embed_one(key, future) for key, future in items])
+    
+    async def _embed_one(self, key: Tuple[str, str], future: asyncio.Future):
+        """Embed a single text and resolve its future"""
+        model, text = key
+        embedding: List[float] = []
+        
+        try:
+            async with self.semaphore:
+                response = await self.client.post(
+                    "/api/embeddings",
+                    json={"model": model, "prompt": text}
+                )
             
             if response.status_code != 200:
                 logger.error(f"Ollama API error: {response.status_code} - {response.text}")
-                return f"Error generating text: {response.status_code}"
-                
-            response_data = response.json()
-            return response_data.get("response", "")
-            
-    except Exception as e:
-        logger.error(f"Error in Ollama text generation: {e}")
-        return f"Error: {str(e)}"
+            else:
+                embedding = response.json().get("embedding", [])
+        except Exception as e:
+            logger.error(f"Error in Ollama embedding generation: {e}")
+        finally:
+            self.inflight.pop(key, None)
+        
+        if embedding:
+            self.cache[key] = embedding
+            if len(self.cache) > EMBED_CACHE_SIZE:
+                self.cache.popitem(last=False)
+        
+        if not future.done():
+            future.set_result(embedding)
+
+_embed_batcher = _EmbedBatcher()
+
+async def close_clients():
+    """Close the embedding batcher's HTTP client (called on application shutdown)"""
+    await _embed_batcher.aclose()
 
 async def generate_embeddings(
     text: str,
@@ -137,6 +382,9 @@ async def generate_embeddings(
     """
     Generate embeddings using the Ollama API
     
+    Concurrent calls are coalesced by a micro-batcher and sent with bounded
+    concurrency instead of one sequential round-trip per text.
+    
     Args:
         text: The text to embed
         model_name: Model to use (default from config)
@@ -145,30 +393,9 @@ async def generate_embeddings(
         List of embedding values
     """
     model = model_name or settings.OLLAMA_MODEL
-    base_url = settings.OLLAMA_BASE_URL
     
     try:
-        # Prepare the request
-        request_data = {
-            "model": model,
-            "prompt": text
-        }
-        
-        # Make the API call
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{base_url}/api/embeddings",
-                json=request_data,
-                timeout=30.0
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Ollama API error: {response.status_code} - {response.text}")
-                return []
-                
-            response_data = response.json()
-            return response_data.get("embedding", [])
-            
+        return await _embed_batcher.submit(text, model)
     except Exception as e:
         logger.error(f"Error in Ollama embedding generation: {e}")
         return []
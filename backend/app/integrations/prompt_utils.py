@@ -0,0 +1,59 @@
+from typing import Optional
+import textwrap
+from functools import lru_cache
+import tiktoken
+
+# Fallback encoding for models tiktoken doesn't know about (Llama, Mixtral, etc.)
+DEFAULT_ENCODING = "cl100k_base"
+
+def canonicalize_prompt(prompt: Optional[str]) -> str:
+    """
+    Normalize a prompt so identical prompts are byte-identical
+    
+    Providers with prefix caching only get a cache hit when the prompt prefix
+    matches exactly, so newlines, indentation and trailing whitespace are
+    normalized before the prompt is sent.
+    
+    Args:
+        prompt: The prompt to normalize
+    
+    Returns:
+        The normalized prompt
+    """
+    if not prompt:
+        return ""
+    
+    text = prompt.replace("\r\n", "\n").replace("\r", "\n")
+    text = textwrap.dedent(text)
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """
+    Count the tokens in a text
+    
+    Counts are memoized since the same system prompts are counted on
+    every conversation turn.
+    
+    Args:
+        text: The text to count
+        model_name: Model whose tokenizer to use, if known to tiktoken
+        
+    Returns:
+        Number of tokens
+    """
+    return _count_tokens(text or "", model_name)
+
+@lru_cache(maxsize=4096)
+def _count_tokens(text: str, model_name: Optional[str]) -> int:
+    """Tokenize and count a text"""
+    return len(_get_encoding(model_name).encode(text))
+
+@lru_cache(maxsize=32)
+def _get_encoding(model_name: Optional[str]):
+    """Get the tiktoken encoding for a model"""
+    if model_name:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            pass
+    return tiktoken.get_encoding(DEFAULT_ENCODING)
@@ -0,0 +1,54 @@
+from typing import Dict, Any, Callable, Awaitable, TypeVar
+import asyncio
+import hashlib
+import json
+
+T = TypeVar("T")
+
+# Pending upstream calls keyed by request hash
+_inflight: Dict[str, asyncio.Task] = {}
+
+def make_request_key(*parts: Any) -> str:
+    """
+    Build a stable SHA-256 key for an LLM request
+    
+    Args:
+        parts: Request components (provider, model, prompt, options, ...)
+    
+    Returns:
+        Hex digest identifying the request
+    """
+    # ensure_ascii output is pure ASCII, so the cheaper ASCII codec suffices
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("ascii")).hexdigest()
+
+async def single_flight(key: str, call: Callable[[], Awaitable[T]]) -> T:
+    """
+    Run a call once for all concurrent callers with the same key
+    
+    The first caller starts the call in its own task; callers arriving while
+    it is pending await the same task instead of issuing a duplicate upstream
+    request. Every caller awaits it through a shield, so a cancelled caller
+    (e.g. a disconnected client) does not cancel the call for the others.
+    
+    Args:
+        key: Request key, see make_request_key
+        call: Zero-argument coroutine function performing the request
+    
+    Returns:
+        The call's result
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(call())
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _finish_call(key, done))
+    return await asyncio.shield(task)
+
+def _finish_call(key: str, task: asyncio.Task):
+    """Drop a finished call from the in-flight table"""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Mark the exception as retrieved in case every caller was cancelled
+    if not task.cancelled():
+        task.exception()
@@ -1,69 +1,439 @@
-from typing import Optional, Dict, Any, List, Union
-import os
+from typing import Optional, Dict, Any, List, Union, AsyncIterator, Tuple
 import asyncio
 import httpx
 import base64
+import hashlib
+import re
+import struct
+import time
+from collections import OrderedDict
+import redis.asyncio as aioredis
+import websockets
 from loguru import logger
-from pathlib import Path
-import tempfile
-import json
+import orjson
+from functools import lru_cache
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
 
 from app.core.config import settings
 
+# Speech metrics, exposed on /metrics
+TTS_REQUESTS = Counter("tts_requests_total", "TTS syntheses by provider and cache result", ["provider", "cache"])
+TTS_CACHE_HITS = Counter("tts_cache_hits_total", "TTS cache hits")
+TTS_LATENCY = Histogram("tts_latency_seconds", "TTS provider latency", ["provider"])
+TTS_FAILURES = Counter("tts_failures_total", "TTS provider failures", ["provider", "reason"])
+STT_LATENCY = Histogram("stt_latency_seconds", "STT provider latency", ["provider"])
+STT_FAILURES = Counter("stt_failures_total", "STT provider failures", ["provider", "reason"])
+# In-process TTS cache statistics (tts_memory_cache_*) come from AudioLRUCollector below
+
+# Shared HTTP client so provider connections are pooled across requests
+_shared_client: Optional[httpx.AsyncClient] = None
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client for speech providers
+    
+    Returns:
+        httpx.AsyncClient: Lazily created client with keep-alive pooling
+    """
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+    return _shared_client
+
+async def close_clients():
+    """Close the shared HTTP and cache clients (called on application shutdown)"""
+    global _shared_client, _tts_redis
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
+    if _tts_redis is not None:
+        await _tts_redis.aclose()
+        _tts_redis = None
+
+# Provider responses worth retrying: rate limits and transient server errors
+_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+_RETRY_BACKOFF = wait_exponential_jitter(initial=1, max=8)
+
+def _is_retryable(error: BaseException) -> bool:
+    """Check whether a failed provider request should be retried"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in _RETRY_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+def _retry_wait(retry_state) -> float:
+    """Wait for the provider's Retry-After if given, else back off exponentially"""
+    error = retry_state.outcome.exception()
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), 30.0)
+    return _RETRY_BACKOFF(retry_state)
+
+@retry(
+    retry=retry_if_exception(_is_retryable),
+    wait=_retry_wait,
+    stop=stop_after_attempt(4),
+    reraise=True
+)
+async def _post_with_retry(url: str, **kwargs) -> httpx.Response:
+    """
+    POST to a speech provider, retrying rate-limited and transient failures
+    
+    Args:
+        url: The endpoint URL
+        kwargs: Request arguments passed to httpx
+        
+    Returns:
+        httpx.Response: The successful response
+    
+    Raises:
+        httpx.HTTPStatusError: If the provider returns an error status
+    """
+    response = await get_client().post(url, **kwargs)
+    response.raise_for_status()
+    return response
+
+def _provider_error(provider_name: str, error: httpx.HTTPStatusError) -> Exception:
+    """Build the error raised for a failed provider response"""
+    return Exception(f"{provider_name} error: {error.response.status_code} - {error.response.text}")
+
+# Speech providers and the API key setting each one requires
+_PROVIDER_API_KEYS = {
+    "elevenlabs": "ELEVENLABS_API_KEY",
+    "openai": "OPENAI_API_KEY"
+}
+_SUPPORTED_TTS_PROVIDERS = {"elevenlabs", "openai"}
+_SUPPORTED_STT_PROVIDERS = {"openai"}
+# Whisper is OpenAI's transcription API
+_STT_PROVIDER_ALIASES = {"whisper": "openai"}
+
+def _resolve_stt_provider(provider: Optional[str]) -> str:
+    """Resolve the STT provider, applying the configured default and aliases"""
+    provider = (provider or settings.STT_PROVIDER).lower()
+    return _STT_PROVIDER_ALIASES.get(provider, provider)
+
+def validate_providers():
+    """
+    Check that the configured TTS/STT providers are supported and have API keys
+    
+    Called at startup so misconfiguration stops the service before the first
+    request. The per-call API key checks stay, since callers can pick a
+    provider other than the configured one for a single request.
+    
+    Raises:
+        ValueError: If a provider is unsupported or its API key is missing
+    """
+    problems = []
+    for kind, provider, supported in (
+        ("TTS", settings.TTS_PROVIDER.lower(), _SUPPORTED_TTS_PROVIDERS),
+        ("STT", _resolve_stt_provider(None), _SUPPORTED_STT_PROVIDERS)
+    ):
+        if provider not in supported:
+            problems.append(f"unsupported {kind} provider '{provider}'")
+        elif not getattr(settings, _PROVIDER_API_KEYS[provider]):
+            problems.append(f"{_PROVIDER_API_KEYS[provider]} is required for {kind} provider '{provider}'")
+    
+    if problems:
+        raise ValueError("; ".join(problems))
+
+# --------------------------
+# Text-to-Speech Cache
+# --------------------------
+
+class AudioLRU:
+    """In-process LRU cache for audio bounded by total size in bytes, with per-entry TTL"""
+    
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get cached audio, refreshing its recency
+        
+        Args:
+            key: The cache key
+            
+        Returns:
+            bytes: The audio data, or None if missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        audio_data, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return audio_data
+    
+    def put(self, key: str, audio_data: bytes):
+        """
+        Cache audio, evicting least recently used entries to stay within the byte budget
+        
+        Args:
+            key: The cache key
+            audio_data: The audio data
+        """
+        size = len(audio_data)
+        if size > self.max_bytes:
+            return
+        
+        if key in self._entries:
+            self._remove(key)
+        while self._entries and self._bytes + size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        
+        self._entries[key] = (audio_data, time.monotonic() + self.ttl)
+        self._bytes += size
+    
+    def _remove(self, key: str):
+        """Drop an entry and release its bytes"""
+        audio_data, _ = self._entries.pop(key)
+        self._bytes -= len(audio_data)
+    
+    @property
+    def size_bytes(self) -> int:
+        """Total size of the cached audio"""
+        return self._bytes
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class AudioLRUCollector:
+    """Prometheus collector exposing an AudioLRU's statistics"""
+    
+    def __init__(self, cache: AudioLRU):
+        self.cache = cache
+    
+    def collect(self):
+        yield CounterMetricFamily("tts_memory_cache_hits", "In-process TTS cache hits", value=self.cache.hits)
+        yield CounterMetricFamily("tts_memory_cache_misses", "In-process TTS cache misses", value=self.cache.misses)
+        yield CounterMetricFamily("tts_memory_cache_evictions", "In-process TTS cache LRU evictions", value=self.cache.evictions)
+        yield GaugeMetricFamily("tts_memory_cache_entries", "Entries in the in-process TTS cache", value=len(self.cache))
+        yield GaugeMetricFamily("tts_memory_cache_bytes", "Audio bytes held by the in-process TTS cache", value=self.cache.size_bytes)
+
+# In-process fallback used when Redis is disabled or unreachable
+_tts_memory_cache = AudioLRU(settings.TTS_CACHE_MAX_BYTES, settings.TTS_CACHE_TTL)
+REGISTRY.register(AudioLRUCollector(_tts_memory_cache))
+_tts_redis: Optional[aioredis.Redis] = None
+# After a Redis failure the in-process cache is used until this monotonic time
+_tts_redis_retry_at = 0.0
+_TTS_REDIS_RETRY_DELAY = 30.0
+
+def _tts_cache_key(provider: str, voice: str, model: str, output_format: str, text: str) -> str:
+    """
+    Build the cache key for a synthesized utterance
+    
+    Args:
+        provider: The TTS provider
+        voice: The voice used
+        model: The TTS model used
+        output_format: The audio format
+        text: The synthesized text
+    
+    Returns:
+        str: Redis key for the audio
+    """
+    digest = hashlib.sha256(f"{provider}|{voice}|{model}|{output_format}|{text}".encode("utf-8")).hexdigest()
+    return f"{settings.REDIS_PREFIX}tts:{digest}"
+
+def _get_tts_redis() -> Optional[aioredis.Redis]:
+    """Get the Redis client for the TTS cache, if Redis caching is enabled"""
+    global _tts_redis
+    if settings.TTS_CACHE_BACKEND.lower() != "redis" or time.monotonic() < _tts_redis_retry_at:
+        return None
+    if _tts_redis is None:
+        _tts_redis = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD
+        )
+    return _tts_redis
+
+def _disable_tts_redis(error: Exception):
+    """Fall back to the in-process cache for a while after a Redis failure"""
+    global _tts_redis_retry_at
+    _tts_redis_retry_at = time.monotonic() + _TTS_REDIS_RETRY_DELAY
+    logger.error(f"TTS Redis cache unavailable, using in-memory cache for {_TTS_REDIS_RETRY_DELAY:.0f}s: {str(error)}")
+
+async def _tts_cache_get(key: str) -> Optional[bytes]:
+    """
+    Look up synthesized audio in the cache
+    
+    Args:
+        key: The cache key
+    
+    Returns:
+        bytes: The cached audio data, or None on a miss
+    """
+    if settings.TTS_CACHE_BACKEND.lower() == "none":
+        return None
+    
+    redis_client = _get_tts_redis()
+    if redis_client is not None:
+        try:
+            return await redis_client.get(key)
+        except Exception as e:
+            _disable_tts_redis(e)
+    
+    return _tts_memory_cache.get(key)
+
+async def _tts_cache_set(key: str, audio_data: bytes):
+    """
+    Store synthesized audio in the cache
+    
+    Args:
+        key: The cache key
+        audio_data: The audio data
+    """
+    if settings.TTS_CACHE_BACKEND.lower() == "none":
+        return
+    
+    redis_client = _get_tts_redis()
+    if redis_client is not None:
+        try:
+            await redis_client.setex(key, settings.TTS_CACHE_TTL, audio_data)
+            return
+        except Exception as e:
+            _disable_tts_redis(e)
+    
+    _tts_memory_cache.put(key, audio_data)
+
 # --------------------------
 # Text-to-Speech Integration
 # --------------------------
 
-async def tts_elevenlabs(
-    text: str, 
-    voice_id: str = "21m00Tcm4TlvDq8ikWAM", 
-    model_id: str = "eleven_monolingual_v1",
-    output_format: str = "mp3"
-) -> bytes:
+# Default ElevenLabs voice settings, shared by every request
+_ELEVEN_VOICE_SETTINGS_DEFAULT = {
+    "stability": 0.5,
+    "similarity_boost": 0.75,
+    "style": 0.0,
+    "use_speaker_boost": True
+}
+
+@lru_cache(maxsize=4)
+def _elevenlabs_headers(api_key: str) -> Dict[str, str]:
+    """Build the (constant) ElevenLabs request headers for an API key"""
+    return {
+        "Accept": "application/json",
+        "xi-api-key": api_key,
+        "Content-Type": "application/json"
+    }
+
+@lru_cache(maxsize=4)
+def _openai_headers(api_key: str, json_body: bool = True) -> Dict[str, str]:
+    """Build the (constant) OpenAI request headers for an API key"""
+    headers = {"Authorization": f"Bearer {api_key}"}
+    if json_body:
+        headers["Content-Type"] = "application/json"
+    return headers
+
+def _elevenlabs_request(text: str, voice_id: str, model_id: str, stream: bool = False) -> Tuple[str, Dict[str, str], bytes]:
     """
-    Convert text to speech using ElevenLabs API
+    Build an ElevenLabs text-to-speech request
     
     Args:
         text: The text to convert to speech
-        voice_id: The voice ID to use (default: Rachel voice)
+        voice_id: The voice ID to use
         model_id: The model ID to use
-        output_format: The output format (mp3, pcm, wav, etc.)
+        stream: Whether to use the streaming endpoint
         
     Returns:
-        bytes: The audio data
+        tuple: The URL, headers and JSON-encoded body
     """
     if not settings.ELEVENLABS_API_KEY:
         logger.error("ElevenLabs API key not set")
         raise ValueError("ElevenLabs API key is required")
     
     url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+    if stream:
+        url = f"{url}/stream?optimize_streaming_latency=3"
     
-    headers = {
-        "Accept": "application/json",
-        "xi-api-key": settings.ELEVENLABS_API_KEY,
-        "Content-Type": "application/json"
-    }
+    headers = _elevenlabs_headers(settings.ELEVENLABS_API_KEY)
     
     payload = {
         "text": text,
         "model_id": model_id,
-        "voice_settings": {
-            "stability": 0.5,
-            "similarity_boost": 0.75,
-            "style": 0.0,
-            "use_speaker_boost": True
-        }
+        "voice_settings": _ELEVEN_VOICE_SETTINGS_DEFAULT
     }
     
+    return url, headers, orjson.dumps(payload)
+
+def _openai_tts_request(text: str, voice: str, model: str, output_format: str) -> Tuple[str, Dict[str, str], bytes]:
+    """
+    Build an OpenAI text-to-speech request
+    
+    Args:
+        text: The text to convert to speech
+        voice: The voice to use
+        model: The model to use
+        output_format: The output format
+        
+    Returns:
+        tuple: The URL, headers and JSON-encoded body
+    """
+    if not settings.OPENAI_API_KEY:
+        logger.error("OpenAI API key not set")
+        raise ValueError("OpenAI API key is required")
+        
+    url = "https://api.openai.com/v1/audio/speech"
+    
+    headers = _openai_headers(settings.OPENAI_API_KEY)
+    
+    payload = {
+        "model": model,
+        "input": text,
+        "voice": voice,
+        "response_format": output_format
+    }
+    
+    return url, headers, orjson.dumps(payload)
+
+async def tts_elevenlabs(
+    text: str, 
+    voice_id: str = "21m00Tcm4TlvDq8ikWAM", 
+    model_id: str = "eleven_monolingual_v1",
+    output_format: str = "mp3"
+) -> bytes:
+    """
+    Convert text to speech using ElevenLabs API
+    
+    Args:
+        text: The text to convert to speech
+        voice_id: The voice ID to use (default: Rachel voice)
+        model_id: The model ID to use
+        output_format: The output format (mp3, pcm, wav, etc.)
+        
+    Returns:
+        bytes: The audio data
+    """
+    url, headers, body = _elevenlabs_request(text, voice_id, model_id)
+    
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
-            
-            if response.status_code == 200:
-                return response.content
-            else:
-                logger.error(f"ElevenLabs TTS error: {response.status_code} - {response.text}")
-                raise Exception(f"ElevenLabs TTS error: {response.status_code} - {response.text}")
+        response = await _post_with_retry(url, content=body, headers=headers)
+        return response.content
+    except httpx.HTTPStatusError as e:
+        error = _provider_error("ElevenLabs TTS", e)
+        logger.error(f"Error in TTS with ElevenLabs: {str(error)}")
+        raise error from e
     except Exception as e:
         logger.error(f"Error in TTS with ElevenLabs: {str(e)}")
         raise
@@ -86,36 +456,322 @@ async def tts_openai(
     Returns:
         bytes: The audio data
     """
-    if not settings.OPENAI_API_KEY:
-        logger.error("OpenAI API key not set")
-        raise ValueError("OpenAI API key is required")
+    url, headers, body = _openai_tts_request(text, voice, model, output_format)
+    
+    try:
+        response = await _post_with_retry(url, content=body, headers=headers)
+        return response.content
+    except httpx.HTTPStatusError as e:
+        error = _provider_error("OpenAI TTS", e)
+        logger.error(f"Error in TTS with OpenAI: {str(error)}")
+        raise error from e
+    except Exception as e:
+        logger.error(f"Error in TTS with OpenAI: {str(e)}")
+        raise
+
+async def _stream_tts(url: str, headers: Dict[str, str], body: bytes, provider_name: str) -> AsyncIterator[bytes]:
+    """
+    Stream audio chunks from a TTS endpoint
+    
+    Args:
+        url: The endpoint URL
+        headers: The request headers
+        body: The JSON-encoded request body
+        provider_name: Provider name for error messages
         
-    url = "https://api.openai.com/v1/audio/speech"
+    Returns:
+        AsyncIterator[bytes]: The audio chunks as they arrive
+    """
+    client = get_client()
+    async with client.stream("POST", url, content=body, headers=headers) as response:
+        if response.status_code != 200:
+            await response.aread()
+            logger.error(f"{provider_name} TTS error: {response.status_code} - {response.text}")
+            raise Exception(f"{provider_name} TTS error: {response.status_code} - {response.text}")
+        
+        async for chunk in response.aiter_bytes(8192):
+            yield chunk
+
+async def tts_elevenlabs_stream(
+    text: str,
+    voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+    model_id: str = "eleven_monolingual_v1"
+) -> AsyncIterator[bytes]:
+    """
+    Stream speech audio from the ElevenLabs streaming endpoint
     
-    headers = {
-        "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    Args:
+        text: The text to convert to speech
+        voice_id: The voice ID to use (default: Rachel voice)
+        model_id: The model ID to use
+        
+    Returns:
+        AsyncIterator[bytes]: The audio chunks as they arrive
+    """
+    url, headers, body = _elevenlabs_request(text, voice_id, model_id, stream=True)
+    async for chunk in _stream_tts(url, headers, body, "ElevenLabs"):
+        yield chunk
+
+async def tts_elevenlabs_streaming(
+    text_iter: AsyncIterator[str],
+    voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+    model_id: str = "eleven_monolingual_v1"
+) -> AsyncIterator[bytes]:
+    """
+    Synthesize incrementally arriving text over the ElevenLabs input-streaming WebSocket
     
-    payload = {
-        "model": model,
-        "input": text,
-        "voice": voice,
-        "response_format": output_format
-    }
+    Text chunks (e.g. LLM tokens) are sent as they arrive while audio is
+    received concurrently, so playback can start before the text is complete.
     
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
+    Args:
+        text_iter: Async iterator of text chunks
+        voice_id: The voice ID to use (default: Rachel voice)
+        model_id: The model ID to use
+        
+    Returns:
+        AsyncIterator[bytes]: The audio chunks as they arrive
+    """
+    if not settings.ELEVENLABS_API_KEY:
+        logger.error("ElevenLabs API key not set")
+        raise ValueError("ElevenLabs API key is required")
+    
+    url = f"wss://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream-input?model_id={model_id}"
+    
+    async with websockets.connect(url) as ws:
+        # Opening message carries the voice settings and API key
+        await ws.send(orjson.dumps({
+            "text": " ",
+            "voice_settings": _ELEVEN_VOICE_SETTINGS_DEFAULT,
+            "xi_api_key": settings.ELEVENLABS_API_KEY
+        }).decode("utf-8"))
+        
+        async def send_text():
+            async for chunk in text_iter:
+                if chunk:
+                    await ws.send(orjson.dumps({"text": chunk, "try_trigger_generation": True}).decode("utf-8"))
+            # An empty text message flushes remaining audio and closes the stream
+            await ws.send('{"text": ""}')
+        
+        sender = asyncio.create_task(send_text())
+        try:
+            async for raw_message in ws:
+                message = orjson.loads(raw_message)
+                if message.get("audio"):
+                    yield base64.b64decode(message["audio"])
+                if message.get("isFinal"):
+                    break
             
-            if response.status_code == 200:
-                return response.content
-            else:
-                logger.error(f"OpenAI TTS error: {response.status_code} - {response.text}")
-                raise Exception(f"OpenAI TTS error: {response.status_code} - {response.text}")
+            # Surface errors from the text iterator
+            await sender
+        except Exception as e:
+            logger.error(f"Error in streaming TTS with ElevenLabs: {str(e)}")
+            raise
+        finally:
+            if not sender.done():
+                sender.cancel()
+
+async def tts_openai_stream(
+    text: str,
+    voice: str = "alloy",
+    model: str = "tts-1",
+    output_format: str = "mp3"
+) -> AsyncIterator[bytes]:
+    """
+    Stream speech audio from the OpenAI TTS API
+    
+    Args:
+        text: The text to convert to speech
+        voice: The voice to use (alloy, echo, fable, onyx, nova, shimmer)
+        model: The model to use (tts-1, tts-1-hd)
+        output_format: The output format (mp3 or opus)
+        
+    Returns:
+        AsyncIterator[bytes]: The audio chunks as they arrive
+    """
+    url, headers, body = _openai_tts_request(text, voice, model, output_format)
+    async for chunk in _stream_tts(url, headers, body, "OpenAI"):
+        yield chunk
+
+# ffmpeg muxer arguments for each output format; raw PCM matches OpenAI's 24 kHz 16-bit mono
+_FFMPEG_FORMATS = {
+    "mp3": ["-f", "mp3"],
+    "wav": ["-f", "wav"],
+    "opus": ["-f", "opus"],
+    "flac": ["-f", "flac"],
+    "aac": ["-f", "adts"],
+    "pcm": ["-f", "s16le", "-ar", "24000", "-ac", "1"]
+}
+
+async def _transcode(audio_data: bytes, from_format: str, to_format: str) -> bytes:
+    """
+    Transcode audio in memory by piping it through ffmpeg
+    
+    Args:
+        audio_data: The source audio
+        from_format: The source format
+        to_format: The target format
+        
+    Returns:
+        bytes: The transcoded audio
+    """
+    if to_format not in _FFMPEG_FORMATS:
+        raise ValueError(f"Unsupported output format: {to_format}")
+    
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        *_FFMPEG_FORMATS[from_format], "-i", "pipe:0",
+        *_FFMPEG_FORMATS[to_format], "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    output, errors = await process.communicate(audio_data)
+    if process.returncode != 0:
+        raise Exception(f"Audio transcoding failed: {errors.decode('utf-8', errors='replace').strip()}")
+    return output
+
+# Caps provider requests across all callers, since one reply fans out per sentence
+_tts_request_slots = asyncio.Semaphore(settings.TTS_MAX_CONCURRENT_REQUESTS)
+
+# Formats whose segments can be joined by concatenation
+_SEGMENTABLE_FORMATS = {"mp3", "pcm", "wav"}
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+def _split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences for per-sentence synthesis
+    
+    Args:
+        text: The text to split
+    
+    Returns:
+        list: The non-empty sentences
+    """
+    return [sentence for sentence in _SENTENCE_BOUNDARY.split(text.strip()) if sentence]
+
+def _tts_segments(text: str, output_format: str) -> List[str]:
+    """
+    Get the segments generate_speech synthesizes (and caches) a text as
+    
+    Args:
+        text: The text to synthesize
+        output_format: The audio format
+    
+    Returns:
+        list: The segments in order
+    """
+    segments = _split_sentences(text) if output_format in _SEGMENTABLE_FORMATS else [text]
+    return segments or [text]
+
+def _resolve_tts_options(provider: Optional[str], voice: Optional[str]) -> Tuple[str, str, str]:
+    """
+    Resolve the TTS provider, voice and model, applying defaults
+    
+    Args:
+        provider: The requested provider, or None for the configured one
+        voice: The requested voice, or None for the provider default
+        
+    Returns:
+        tuple: The provider, voice and model
+    """
+    # Use configured provider if not specified
+    if not provider:
+        provider = settings.TTS_PROVIDER.lower()
+    
+    if provider == "elevenlabs":
+        voice = voice or "21m00Tcm4TlvDq8ikWAM"  # Default to Rachel voice
+        model = "eleven_monolingual_v1"
+    elif provider == "openai":
+        voice = voice or "alloy"
+        model = "tts-1"
+    else:
+        raise ValueError(f"Unsupported TTS provider: {provider}")
+    
+    return provider, voice, model
+
+async def _synthesize_cached(
+    provider: str,
+    text: str,
+    voice: str,
+    model: str,
+    output_format: str
+) -> bytes:
+    """
+    Synthesize a text segment, serving repeats from the cache
+    
+    Args:
+        provider: The TTS provider
+        text: The text segment
+        voice: The voice to use
+        model: The TTS model to use
+        output_format: The audio format
+    
+    Returns:
+        bytes: The audio data
+    """
+    cache_key = _tts_cache_key(provider, voice, model, output_format, text)
+    audio_data = await _tts_cache_get(cache_key)
+    if audio_data is not None:
+        TTS_REQUESTS.labels(provider, "hit").inc()
+        TTS_CACHE_HITS.inc()
+        return audio_data
+    
+    TTS_REQUESTS.labels(provider, "miss").inc()
+    try:
+        async with _tts_request_slots:
+            with TTS_LATENCY.labels(provider).time():
+                if provider == "elevenlabs":
+                    audio_data = await tts_elevenlabs(text, voice_id=voice, model_id=model, output_format=output_format)
+                    # ElevenLabs always returns MP3
+                    if output_format != "mp3":
+                        audio_data = await _transcode(audio_data, "mp3", output_format)
+                else:
+                    audio_data = await tts_openai(text, voice=voice, model=model, output_format=output_format)
     except Exception as e:
-        logger.error(f"Error in TTS with OpenAI: {str(e)}")
+        TTS_FAILURES.labels(provider, type(e).__name__).inc()
         raise
+    
+    await _tts_cache_set(cache_key, audio_data)
+    return audio_data
+
+def _wav_data_offset(audio_data: bytes) -> int:
+    """Get the offset of the sample data in a WAV file"""
+    offset = 12
+    while offset + 8 <= len(audio_data):
+        chunk_id = audio_data[offset:offset + 4]
+        chunk_size = struct.unpack("<I", audio_data[offset + 4:offset + 8])[0]
+        if chunk_id == b"data":
+            return offset + 8
+        offset += 8 + chunk_size + (chunk_size & 1)
+    raise ValueError("WAV data chunk not found")
+
+def _join_audio(segments: List[bytes], output_format: str) -> bytes:
+    """
+    Join synthesized segments into one audio stream
+    
+    MP3 frames are self-synchronizing and PCM is headerless, so both are
+    joined by concatenation; WAV samples are concatenated under one header.
+    
+    Args:
+        segments: The audio segments in order
+        output_format: The audio format
+    
+    Returns:
+        bytes: The joined audio data
+    """
+    if len(segments) == 1:
+        return segments[0]
+    
+    if output_format != "wav":
+        return b"".join(segments)
+    
+    first_offset = _wav_data_offset(segments[0])
+    samples = b"".join(segment[_wav_data_offset(segment):] for segment in segments)
+    header = bytearray(segments[0][:first_offset])
+    header[first_offset - 4:first_offset] = struct.pack("<I", len(samples))
+    header[4:8] = struct.pack("<I", len(header) - 8 + len(samples))
+    return bytes(header) + samples
 
 async def generate_speech(
     text: str,
@@ -133,24 +789,22 @@ async def generate_speech(
         voice: The voice to use (provider-specific)
         output_format: The output format
         return_base64: Whether to return base64-encoded data
-        
+    
     Returns:
         bytes or str: The audio data or base64-encoded audio data
     """
-    # Use configured provider if not specified
-    if not provider:
-        provider = settings.TTS_PROVIDER.lower()
+    provider, voice, model = _resolve_tts_options(provider, voice)
     
-    # Generate speech based on provider
-    audio_data = None
-    if provider == "elevenlabs":
-        voice_id = voice or "21m00Tcm4TlvDq8ikWAM"  # Default to Rachel voice
-        audio_data = await tts_elevenlabs(text, voice_id=voice_id, output_format=output_format)
-    elif provider == "openai":
-        voice_name = voice or "alloy"
-        audio_data = await tts_openai(text, voice=voice_name, output_format=output_format)
-    else:
-        raise ValueError(f"Unsupported TTS provider: {provider}")
+    # Synthesize sentence by sentence so shared sentences hit the cache
+    segments = _tts_segments(text, output_format)
+    
+    unique_segments = list(dict.fromkeys(segments))
+    audio_segments = await asyncio.gather(*[
+        _synthesize_cached(provider, segment, voice, model, output_format)
+        for segment in unique_segments
+    ])
+    audio_by_segment = dict(zip(unique_segments, audio_segments))
+    audio_data = _join_audio([audio_by_segment[segment] for segment in segments], output_format)
     
     # Return data in requested format
     if return_base64:
@@ -158,6 +812,194 @@ async def generate_speech(
     else:
         return audio_data
 
+async def generate_speech_batch(
+    texts: List[str],
+    provider: Optional[str] = None,
+    voice: Optional[str] = None,
+    output_format: str = "mp3",
+    return_base64: bool = False,
+    concurrency: int = 8
+) -> List[Union[bytes, str]]:
+    """
+    Generate speech for several texts concurrently
+    
+    Cached texts are served without a provider call; at most `concurrency`
+    texts are synthesized at a time. Each text may need one provider request
+    per sentence, so provider requests are bounded separately, across all
+    callers, by TTS_MAX_CONCURRENT_REQUESTS.
+    
+    Args:
+        texts: The texts to convert to speech
+        provider: The provider to use (elevenlabs, openai)
+        voice: The voice to use (provider-specific)
+        output_format: The output format
+        return_base64: Whether to return base64-encoded data
+        concurrency: Maximum number of texts synthesized concurrently
+        
+    Returns:
+        list: The audio data for each text, in order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def _generate_one(text: str) -> Union[bytes, str]:
+        async with semaphore:
+            return await generate_speech(
+                text,
+                provider=provider,
+                voice=voice,
+                output_format=output_format,
+                return_base64=return_base64
+            )
+    
+    return await asyncio.gather(*[_generate_one(text) for text in texts])
+
+# Background synthesis tasks started by warmup_tts_cache, keyed by the
+# candidate's cache key so a pending candidate is not scheduled twice
+_warmup_tasks: Dict[str, asyncio.Task] = {}
+_MAX_WARMUP_TASKS = 32
+
+async def warmup_tts_cache(
+    candidates: List[str],
+    provider: Optional[str] = None,
+    voice: Optional[str] = None,
+    output_format: str = "mp3"
+) -> int:
+    """
+    Speculatively synthesize likely responses into the TTS cache
+    
+    Candidates whose segments are all cached, or that are already being
+    synthesized, are skipped; the rest are synthesized in the background so
+    that, if one is confirmed, generate_speech serves it from the cache.
+    At most _MAX_WARMUP_TASKS run at once; further candidates are dropped.
+    Unconfirmed candidates are simply left to expire.
+    
+    Args:
+        candidates: Candidate response texts
+        provider: The provider to use (elevenlabs, openai)
+        voice: The voice to use (provider-specific)
+        output_format: The output format
+        
+    Returns:
+        int: Number of candidates scheduled for synthesis
+    """
+    provider, voice, model = _resolve_tts_options(provider, voice)
+    
+    scheduled = 0
+    for text in dict.fromkeys(candidates):
+        if len(_warmup_tasks) >= _MAX_WARMUP_TASKS:
+            break
+        
+        warmup_key = _tts_cache_key(provider, voice, model, output_format, text)
+        if warmup_key in _warmup_tasks:
+            continue
+        
+        # Probe the same per-segment keys generate_speech would fill
+        cached = True
+        for segment in dict.fromkeys(_tts_segments(text, output_format)):
+            if await _tts_cache_get(_tts_cache_key(provider, voice, model, output_format, segment)) is None:
+                cached = False
+                break
+        if cached or warmup_key in _warmup_tasks:
+            continue
+        
+        task = asyncio.create_task(generate_speech(text, provider=provider, voice=voice, output_format=output_format))
+        task.add_done_callback(lambda done, key=warmup_key: _finish_warmup(key, done))
+        _warmup_tasks[warmup_key] = task
+        scheduled += 1
+    return scheduled
+
+def _finish_warmup(key: str, task: asyncio.Task):
+    """Release a finished warmup task and log its failure, if any"""
+    if _warmup_tasks.get(key) is task:
+        del _warmup_tasks[key]
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"TTS cache warmup failed: {str(task.exception())}")
+
+async def _stream_segment(
+    provider: str,
+    text: str,
+    voice: str,
+    model: str,
+    output_format: str
+) -> AsyncIterator[bytes]:
+    """
+    Stream one text segment, serving it from the cache when possible
+    
+    Uses the same cache keys as _synthesize_cached, and holds a provider
+    request slot while the provider response is streamed.
+    
+    Args:
+        provider: The TTS provider
+        text: The text segment
+        voice: The voice to use
+        model: The TTS model to use
+        output_format: The audio format
+        
+    Returns:
+        AsyncIterator[bytes]: The audio chunks
+    """
+    cache_key = _tts_cache_key(provider, voice, model, output_format, text)
+    audio_data = await _tts_cache_get(cache_key)
+    if audio_data is not None:
+        TTS_REQUESTS.labels(provider, "hit").inc()
+        TTS_CACHE_HITS.inc()
+        yield audio_data
+        return
+    
+    TTS_REQUESTS.labels(provider, "miss").inc()
+    buffer = bytearray()
+    async with _tts_request_slots:
+        if provider == "elevenlabs":
+            chunks = tts_elevenlabs_stream(text, voice_id=voice, model_id=model)
+        else:
+            chunks = tts_openai_stream(text, voice=voice, model=model, output_format=output_format)
+        
+        start_time = time.perf_counter()
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                yield chunk
+        except Exception as e:
+            TTS_FAILURES.labels(provider, type(e).__name__).inc()
+            raise
+        TTS_LATENCY.labels(provider).observe(time.perf_counter() - start_time)
+    
+    await _tts_cache_set(cache_key, bytes(buffer))
+
+async def generate_speech_stream(
+    text: str,
+    provider: Optional[str] = None,
+    voice: Optional[str] = None,
+    output_format: str = "mp3"
+) -> AsyncIterator[bytes]:
+    """
+    Generate speech from text, yielding audio chunks as they are synthesized
+    
+    Like generate_speech, the text is synthesized sentence by sentence and
+    each sentence is cached on its own: cached sentences are yielded at once
+    and the rest are streamed from the provider. WAV segments share one
+    header and ElevenLabs only streams MP3, so those requests are
+    synthesized in full by generate_speech instead.
+    
+    Args:
+        text: The text to convert to speech
+        provider: The provider to use (elevenlabs, openai)
+        voice: The voice to use (provider-specific)
+        output_format: The output format
+        
+    Returns:
+        AsyncIterator[bytes]: The audio chunks
+    """
+    provider, voice, model = _resolve_tts_options(provider, voice)
+    
+    if output_format == "wav" or (provider == "elevenlabs" and output_format != "mp3"):
+        yield await generate_speech(text, provider=provider, voice=voice, output_format=output_format)
+        return
+    
+    for segment in _tts_segments(text, output_format):
+        async for chunk in _stream_segment(provider, segment, voice, model, output_format):
+            yield chunk
+
 # --------------------------
 # Speech-to-Text Integration
 # --------------------------
@@ -186,49 +1028,30 @@ async def stt_openai(
     
     url = "https://api.openai.com/v1/audio/transcriptions"
     
-    headers = {
-        "Authorization": f"Bearer {settings.OPENAI_API_KEY}"
-    }
+    headers = _openai_headers(settings.OPENAI_API_KEY, json_body=False)
     
-    # Create temporary file for the audio
-    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as temp_file:
-        temp_file.write(audio_data)
-        temp_file_path = temp_file.name
+    # Send the in-memory audio directly as the multipart file
+    files = {"file": ("audio.mp3", audio_data, "audio/mpeg")}
     
-    try:
-        # Prepare form data
-        form_data = {
-            "file": open(temp_file_path, "rb"),
-            "model": model,
-        }
-        
-        if language:
-            form_data["language"] = language
-            
-        if prompt:
-            form_data["prompt"] = prompt
+    form_data = {"model": model}
+    
+    if language:
+        form_data["language"] = language
         
+    if prompt:
+        form_data["prompt"] = prompt
+    
+    try:
         # Send request
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url, 
-                headers=headers,
-                files={"file": (os.path.basename(temp_file_path), open(temp_file_path, "rb"), "audio/mpeg")},
-                data=form_data
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"OpenAI STT error: {response.status_code} - {response.text}")
-                raise Exception(f"OpenAI STT error: {response.status_code} - {response.text}")
+        response = await _post_with_retry(url, headers=headers, files=files, data=form_data)
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        error = _provider_error("OpenAI STT", e)
+        logger.error(f"Error in STT with OpenAI: {str(error)}")
+        raise error from e
     except Exception as e:
         logger.error(f"Error in STT with OpenAI: {str(e)}")
         raise
-    finally:
-        # Clean up temporary file
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
 
 async def transcribe_audio(
     audio_data: Union[bytes, str],
@@ -251,8 +1074,7 @@ async def transcribe_audio(
         dict: The transcription result
     """
     # Use configured provider if not specified
-    if not provider:
-        provider = settings.STT_PROVIDER.lower()
+    provider = _resolve_stt_provider(provider)
     
     # Decode base64 if needed
     if is_base64 and isinstance(audio_data, str):
@@ -260,7 +1082,12 @@ async def transcribe_audio(
     
     # Transcribe based on provider
     if provider == "openai":
-        result = await stt_openai(audio_data, language=language, prompt=prompt)
+        try:
+            with STT_LATENCY.labels(provider).time():
+                result = await stt_openai(audio_data, language=language, prompt=prompt)
+        except Exception as e:
+            STT_FAILURES.labels(provider, type(e).__name__).inc()
+            raise
         return result
     else:
         raise ValueError(f"Unsupported STT provider: {provider}") 
\ No newline at end of file
@@ -1,11 +1,29 @@
-from typing import Union, Optional, Dict, Any
+from typing import Union, Optional, Dict, Any, List
 from app.integrations.speech_processing import (
     generate_speech,
+    generate_speech_batch,
+    generate_speech_stream,
     tts_elevenlabs,
-    tts_openai
+    tts_openai,
+    tts_elevenlabs_stream,
+    tts_elevenlabs_streaming,
+    tts_openai_stream,
+    warmup_tts_cache
 )
 
-__all__ = ["convert_text_to_speech", "tts_elevenlabs", "tts_openai", "generate_speech"]
+__all__ = [
+    "convert_text_to_speech",
+    "convert_text_to_speech_batch",
+    "tts_elevenlabs",
+    "tts_openai",
+    "tts_elevenlabs_stream",
+    "tts_elevenlabs_streaming",
+    "tts_openai_stream",
+    "generate_speech",
+    "generate_speech_batch",
+    "generate_speech_stream",
+    "warmup_tts_cache"
+]
 
 async def convert_text_to_speech(
     text: str,
@@ -34,3 +52,35 @@ async def convert_text_to_speech(
         output_format=output_format,
         return_base64=return_base64
     )
+
+
+async def convert_text_to_speech_batch(
+    texts: List[str],
+    provider: Optional[str] = None,
+    voice: Optional[str] = None,
+    output_format: str = "mp3",
+    return_base64: bool = False,
+    concurrency: int = 8
+) -> List[Union[bytes, str]]:
+    """
+    Convert several texts to speech concurrently
+    
+    Args:
+        texts: The texts to convert to speech
+        provider: The provider to use (elevenlabs, openai)
+        voice: The voice to use (provider-specific)
+        output_format: The output format (mp3, wav, etc.)
+        return_base64: Whether to return base64-encoded data
+        concurrency: Maximum number of concurrent provider requests
+        
+    Returns:
+        list: The audio data for each text, in order
+    """
+    return await generate_speech_batch(
+        texts,
+        provider=provider,
+        voice=voice,
+        output_format=output_format,
+        return_base64=return_base64,
+        concurrency=concurrency
+    )
\ No newline at end of file
@@ -2,6 +2,7 @@ from fastapi import FastAPI, Request, Depends
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
+from prometheus_client import make_asgi_app
 import time
 import asyncio
 from typing import List
@@ -9,6 +10,9 @@ from typing import List
 from app.core.config import settings
 from app.api.deps import get_current_user
 from app.db import init_mongodb, init_redis
+from app.integrations.langchain_integration import configure_llm_cache
+from app.integrations.ollama_interface import close_clients as close_ollama_clients
+from app.integrations.speech_processing import close_clients, validate_providers
 from app.schemas.users import User
 
 # Import API routers
@@ -54,6 +58,9 @@ app.include_router(api_router, prefix=settings.API_PREFIX)
 # Include flow router
 app.include_router(flow_router, prefix=f"{settings.API_PREFIX}/flow", tags=["flow"])
 
+# Prometheus metrics endpoint
+app.mount("/metrics", make_asgi_app())
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -73,6 +80,15 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to initialize Redis: {e}")
     
+    # Enable the persistent LLM cache if configured
+    try:
+        configure_llm_cache()
+    except Exception as e:
+        logger.error(f"Failed to initialize LLM cache: {e}")
+    
+    # Check speech provider configuration up front; a bad setup aborts startup
+    validate_providers()
+    
     logger.info(f"Aetherion AR Backend started with API version {settings.API_VERSION}")
 
 # Shutdown event
@@ -80,4 +96,6 @@ async def startup_event():
 async def shutdown_event():
     logger.info("Shutting down Aetherion AR Backend...")
     # Close any connections or perform cleanup here
+    await close_clients()
+    await close_ollama_clients()
     logger.info("Aetherion AR Backend shutdown complete") 
\ No newline at end of file
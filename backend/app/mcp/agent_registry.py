@@ -1,25 +1,54 @@
 from typing import Dict, List, Any, Optional, Callable, Set, Awaitable
+import asyncio
+import os
+import time
 import uuid
-from datetime import datetime
-from pydantic import BaseModel, Field
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
 from loguru import logger
 
-class AgentCapability(BaseModel):
+# Registry entries are plain slotted dataclasses: they are built from
+# already-validated requests, so they skip Pydantic validation overhead
+
+@dataclass(slots=True)
+class AgentCapability:
     """Model for an agent capability"""
     name: str
     description: str
-    parameters: Dict[str, Any] = Field(default_factory=dict)
+    parameters: Dict[str, Any] = field(default_factory=dict)
     example: Optional[Dict[str, Any]] = None
 
-class RegisteredAgent(BaseModel):
+@dataclass(slots=True)
+class RegisteredAgent:
     """Model for a registered agent"""
     agent_id: str
     name: str
     description: str
-    capabilities: List[AgentCapability] = Field(default_factory=list)
+    capabilities: List[AgentCapability] = field(default_factory=list)
     status: str = "online"  # online, offline, busy
-    last_heartbeat: datetime = Field(default_factory=datetime.utcnow)
-    metadata: Dict[str, Any] = Field(default_factory=dict)
+    last_heartbeat_ns: int = field(default_factory=time.monotonic_ns)  # Monotonic clock, see agent_to_dict
+    heartbeated: bool = False  # Only agents that send heartbeats can be reaped
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+# Number of agent IDs generated per batch of random bytes
+_AGENT_ID_BATCH = 256
+
+def agent_to_dict(agent: RegisteredAgent) -> Dict[str, Any]:
+    """
+    Serialize a registered agent, converting its heartbeat to wall-clock time
+    
+    Args:
+        agent: The registered agent
+        
+    Returns:
+        Agent fields with last_heartbeat as a UTC datetime
+    """
+    data = asdict(agent)
+    heartbeat_age_ns = time.monotonic_ns() - data.pop("last_heartbeat_ns")
+    del data["heartbeated"]
+    data["last_heartbeat"] = datetime.utcnow() - timedelta(microseconds=heartbeat_age_ns // 1000)
+    return data
 
 class AgentRegistry:
     """Registry for managing agent registrations and capabilities"""
@@ -27,6 +56,26 @@ class AgentRegistry:
     def __init__(self):
         self.agents: Dict[str, RegisteredAgent] = {}
         self.capability_map: Dict[str, Set[str]] = {}  # Map capability names to agent IDs
+        self.online_agents: Set[str] = set()  # IDs of agents with status "online"
+        self._rr_counter: Dict[str, int] = defaultdict(int)  # Round-robin position per capability
+        self._agent_ids: deque = deque()  # Pre-generated agent IDs
+        self._capability_detail: Dict[str, Dict[str, Any]] = {}  # Serialized details per capability name
+        self._capability_owner: Dict[str, str] = {}  # Agent whose declaration the details came from
+    
+    def _set_capability_detail(self, capability: AgentCapability, agent_id: str):
+        """Record the details of a capability as declared by an agent"""
+        self._capability_detail[capability.name] = asdict(capability)
+        self._capability_owner[capability.name] = agent_id
+    
+    def _next_agent_id(self) -> str:
+        """Get a new random agent ID, generating them in batches from one urandom read"""
+        if not self._agent_ids:
+            random_bytes = os.urandom(16 * _AGENT_ID_BATCH)
+            self._agent_ids.extend(
+                str(uuid.UUID(bytes=random_bytes[i:i + 16], version=4))
+                for i in range(0, len(random_bytes), 16)
+            )
+        return self._agent_ids.popleft()
         
     def register_agent(self, 
                        name: str, 
@@ -45,7 +94,7 @@ class AgentRegistry:
         Returns:
             Agent ID
         """
-        agent_id = str(uuid.uuid4())
+        agent_id = self._next_agent_id()
         
         agent = RegisteredAgent(
             agent_id=agent_id,
@@ -57,12 +106,15 @@ class AgentRegistry:
         
         # Add to agents registry
         self.agents[agent_id] = agent
+        self.online_agents.add(agent_id)
         
         # Update capability map
         for capability in capabilities:
             if capability.name not in self.capability_map:
                 self.capability_map[capability.name] = set()
             self.capability_map[capability.name].add(agent_id)
+            if capability.name not in self._capability_detail:
+                self._set_capability_detail(capability, agent_id)
             
         logger.info(f"Agent registered: {name} with ID {agent_id}")
         return agent_id
@@ -82,7 +134,12 @@ class AgentRegistry:
             return False
             
         self.agents[agent_id].status = status
-        self.agents[agent_id].last_heartbeat = datetime.utcnow()
+        self.agents[agent_id].last_heartbeat_ns = time.monotonic_ns()
+        
+        if status == "online":
+            self.online_agents.add(agent_id)
+        else:
+            self.online_agents.discard(agent_id)
         return True
     
     def update_agent_heartbeat(self, agent_id: str) -> bool:
@@ -98,7 +155,9 @@ class AgentRegistry:
         if agent_id not in self.agents:
             return False
             
-        self.agents[agent_id].last_heartbeat = datetime.utcnow()
+        agent = self.agents[agent_id]
+        agent.last_heartbeat_ns = time.monotonic_ns()
+        agent.heartbeated = True
         return True
     
     def unregister_agent(self, agent_id: str) -> bool:
@@ -122,10 +181,21 @@ class AgentRegistry:
                 # Clean up empty sets
                 if not self.capability_map[capability.name]:
                     del self.capability_map[capability.name]
+                    self._rr_counter.pop(capability.name, None)
+                    self._capability_detail.pop(capability.name, None)
+                    self._capability_owner.pop(capability.name, None)
+                elif self._capability_owner.get(capability.name) == agent_id:
+                    # Take the details from another agent still providing it
+                    other_id = next(iter(self.capability_map[capability.name]))
+                    for other_capability in self.agents[other_id].capabilities:
+                        if other_capability.name == capability.name:
+                            self._set_capability_detail(other_capability, other_id)
+                            break
         
         # Remove from agents registry
         agent_name = self.agents[agent_id].name
         del self.agents[agent_id]
+        self.online_agents.discard(agent_id)
         
         logger.info(f"Agent unregistered: {agent_name} with ID {agent_id}")
         return True
@@ -176,6 +246,61 @@ class AgentRegistry:
         """
         return list(self.capability_map.keys())
     
+    def get_capability_details(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the details of every available capability
+        
+        Details are indexed on registration, so this does not scan agents.
+        
+        Returns:
+            Serialized capability details keyed by capability name
+        """
+        return self._capability_detail
+    
+    def reap_stale_agents(self, ttl: float, keep: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """
+        Unregister agents whose last heartbeat is older than the TTL
+        
+        Agents that have never sent a heartbeat (those registered over HTTP
+        or Kafka) are not expected to, so they are never reaped.
+        
+        Args:
+            ttl: Maximum heartbeat age in seconds
+            keep: Optional predicate for agents to keep regardless (e.g. still connected)
+            
+        Returns:
+            IDs of the unregistered agents
+        """
+        cutoff_ns = time.monotonic_ns() - int(ttl * 1_000_000_000)
+        stale = [
+            agent_id for agent_id, agent in self.agents.items()
+            if agent.heartbeated
+            and agent.last_heartbeat_ns < cutoff_ns
+            and not (keep and keep(agent_id))
+        ]
+        
+        for agent_id in stale:
+            self.unregister_agent(agent_id)
+        return stale
+    
+    async def run_reaper(self, ttl: float, interval: float, keep: Optional[Callable[[str], bool]] = None):
+        """
+        Periodically unregister agents with expired heartbeats
+        
+        Args:
+            ttl: Maximum heartbeat age in seconds
+            interval: Seconds between sweeps
+            keep: Optional predicate for agents to keep regardless
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                stale = self.reap_stale_agents(ttl, keep)
+                if stale:
+                    logger.info(f"Reaped {len(stale)} stale agents")
+            except Exception as e:
+                logger.error(f"Error reaping stale agents: {e}")
+    
     def find_agent_for_task(self, capability_name: str) -> Optional[str]:
         """
         Find an available agent with the required capability
@@ -186,21 +311,17 @@ class AgentRegistry:
         Returns:
             Agent ID if found, None otherwise
         """
-        if capability_name not in self.capability_map:
-            return None
-            
         # Find online agents with capability
-        available_agents = [
-            agent_id for agent_id in self.capability_map[capability_name]
-            if agent_id in self.agents and self.agents[agent_id].status == "online"
-        ]
+        available_agents = self.capability_map.get(capability_name, set()) & self.online_agents
         
         if not available_agents:
             return None
-            
-        # Simple scheduling: return the first available agent
-        # In a more sophisticated system, this could use load balancing
-        return available_agents[0]
+        
+        # Round-robin over the available agents to spread load
+        candidates = sorted(available_agents)
+        index = self._rr_counter[capability_name] % len(candidates)
+        self._rr_counter[capability_name] += 1
+        return candidates[index]
 
 # Singleton instance
 agent_registry = AgentRegistry() 
\ No newline at end of file
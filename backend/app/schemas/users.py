@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -36,8 +36,8 @@ class User(UserBase):
     created_at: datetime
     preferences: Dict[str, Any] = {}
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "id": "user123",
                 "email": "user@example.com",
@@ -51,4 +51,5 @@ class User(UserBase):
                     "language": "en"
                 }
             }
-        } 
\ No newline at end of file
+        }
+    )
\ No newline at end of file
@@ -7,12 +7,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from starlette.middleware.sessions import SessionMiddleware
 from loguru import logger
+from prometheus_client import make_asgi_app
 import asyncio
 from typing import List
 
 # Import settings directly from config
 from app.core.config import settings
 from app.db import init_mongodb, init_redis
+from app.integrations.langchain_integration import configure_llm_cache
+from app.integrations.ollama_interface import close_clients as close_ollama_clients
+from app.integrations.speech_processing import close_clients, validate_providers
 
 # Import API routers
 from app.api.api import api_router
@@ -66,6 +70,9 @@ app.include_router(api_router, prefix=settings.API_PREFIX)
 # Include flow router
 app.include_router(flow_router, prefix=f"{settings.API_PREFIX}/flow", tags=["flow"])
 
+# Prometheus metrics endpoint
+app.mount("/metrics", make_asgi_app())
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -85,6 +92,15 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to initialize Redis: {e}")
     
+    # Enable the persistent LLM cache if configured
+    try:
+        configure_llm_cache()
+    except Exception as e:
+        logger.error(f"Failed to initialize LLM cache: {e}")
+    
+    # Check speech provider configuration up front; a bad setup aborts startup
+    validate_providers()
+    
     logger.info(f"Aetherion AR Backend started with API version {settings.API_VERSION}")
 
 # Shutdown event
@@ -92,6 +108,8 @@ async def startup_event():
 async def shutdown_event():
     logger.info("Shutting down Aetherion AR Backend...")
     # Close any connections or perform cleanup here
+    await close_clients()
+    await close_ollama_clients()
     logger.info("Aetherion AR Backend shutdown complete")
 
 if __name__ == "__main__":
@@ -104,5 +122,8 @@ if __name__ == "__main__":
         host=host,
         port=port,
         reload=True,
-        log_level="info"
+        log_level="info",
+        loop="uvloop",
+        # Broadcast frames are sent to many peers; skip per-connection compression
+        ws_per_message_deflate=False
     ) 
\ No newline at end of file